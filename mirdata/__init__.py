@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import importlib
 
 from .version import version as __version__
 
@@ -21,3 +22,11 @@ __all__ = [
     'salami',
     'tinysol',
 ]
+
+
+def __getattr__(name):
+    # import dataset modules the first time they are accessed, e.g.
+    # `mirdata.orchset`, so that `import mirdata` stays cheap
+    if name in __all__:
+        return importlib.import_module('.{}'.format(name), __name__)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
@@ -4,16 +4,56 @@
 Attributes:
     RemoteFileMetadata (namedtuple): It specifies the metadata of the remote file to download.
         The metadata consists of `filename`, `url`, `checksum`, and `destination_dir`.
+        `checksum` is an md5 hash, or `<algorithm>:<hash>` for any other algorithm
+        supported by `hashlib`, or `blake3:<hash>` if `blake3` is installed.
+        Files ending in `.zip`, `.tar.gz`, `.tgz`, `.tar`, `.tar.zst` or `.zst` are
+        extracted after downloading. When the archive format can be chosen,
+        `.tar.zst` is preferred: it decompresses several times faster than gzip.
 """
 
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import functools
+import hashlib
+import io
+import json
+import mmap
 import os
+import shutil
+import subprocess
+import threading
 from tqdm import tqdm
-import urllib
+import requests
+from requests.adapters import HTTPAdapter
 import tarfile
+from urllib3.util.retry import Retry
 import zipfile
 
-from mirdata.utils import md5
+# libarchive decompresses in C, outside of the GIL. It is only installed if
+# the user explicitly asks for it, otherwise zipfile/tarfile are used.
+# libarchive-c loads the C library when imported, which raises OSError or
+# AttributeError if the library is missing or too old.
+try:
+    import libarchive
+    import libarchive.extract
+except (ImportError, OSError, AttributeError):
+    libarchive = None
+
+# zstandard is only needed for .zst files, and only if the zstd command is
+# not installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# blake3 hashes several times faster than md5, and is only needed for remotes
+# whose checksum is given as 'blake3:<hash>'
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+from mirdata.utils import hash_file, md5
 
 
 # destination dir should be a relative path to save the file/s, or None
@@ -21,6 +61,43 @@ RemoteFileMetadata = namedtuple(
     'RemoteFileMetadata', ['filename', 'url', 'checksum', 'destination_dir']
 )
 
+# maximum number of remotes fetched concurrently by `downloader`
+MAX_DOWNLOAD_WORKERS = 8
+
+# number of bytes read from the network and written to disk at a time
+DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+
+# files larger than this are fetched as concurrent byte ranges when the server
+# supports it. Each range is RANGED_DOWNLOAD_SEGMENT_SIZE bytes long.
+RANGED_DOWNLOAD_MIN_SIZE = 64 * 1024 * 1024
+RANGED_DOWNLOAD_SEGMENT_SIZE = 64 * 1024 * 1024
+RANGED_DOWNLOAD_WORKERS = 4
+
+# suffix of files being downloaded in ranges; their manifest adds '.json'
+PARTIAL_DOWNLOAD_SUFFIX = '.part'
+
+# size of the blocks in which the zipfile fallback writes extracted files
+EXTRACT_BUFFER_SIZE = 1 << 20
+
+# multi-threaded gzip decompressors used by `untar`, in order of preference
+PARALLEL_GUNZIP_COMMANDS = ['rapidgzip', 'pigz', 'igzip']
+
+# zip files up to this size are downloaded and extracted in memory, without
+# writing the archive to disk. Can be set with MIRDATA_MEM_EXTRACT_MAX.
+MEM_EXTRACT_MAX_SIZE = int(os.environ.get('MIRDATA_MEM_EXTRACT_MAX', 128 * 1024 * 1024))
+
+# number of zip files held in memory at once by the download workers, which
+# bounds their memory use to MEM_EXTRACT_MAX_FILES * MEM_EXTRACT_MAX_SIZE.
+# Further zip files are downloaded to disk.
+MEM_EXTRACT_MAX_FILES = 2
+_MEM_EXTRACT_SLOTS = threading.BoundedSemaphore(MEM_EXTRACT_MAX_FILES)
+
+# number of connections kept alive per host by the shared HTTP session
+HTTP_POOL_CONNECTIONS = 16
+
+# suffix of the sidecar file recording that a download passed its checksum
+CHECKSUM_MARKER_SUFFIX = '.md5ok'
+
 
 def downloader(
     save_dir,
@@ -50,8 +127,7 @@ def downloader(
             Whether to delete the zip/tar file after extracting.
 
     """
-    if not os.path.exists(save_dir):
-        os.makedirs(save_dir)
+    os.makedirs(save_dir, exist_ok=True)
 
     if remotes is not None:
         if partial_download is not None:
@@ -68,32 +144,195 @@ def downloader(
         else:
             objs_to_download = list(remotes.keys())
 
+        if not force_overwrite:
+            # skip files which were already downloaded and verified
+            objs_to_download = [
+                k for k in objs_to_download if not _is_downloaded(remotes[k], save_dir)
+            ]
+
         print("Starting to download {} to folder {}".format(objs_to_download, save_dir))
 
+        buckets = {'zip': [], 'tar': [], 'zst': [], 'file': []}
         for k in objs_to_download:
-            print("> downloading {}".format(k))
-            extension = os.path.splitext(remotes[k].filename)[-1]
-            if '.zip' in extension:
-                download_zip_file(remotes[k], save_dir, force_overwrite, cleanup)
-            elif '.gz' in extension or '.tar' in extension:
-                download_tar_file(remotes[k], save_dir, force_overwrite, cleanup)
-            else:
-                download_from_remote(remotes[k], save_dir, force_overwrite)
+            buckets[_kind(remotes[k].filename)].append(k)
+
+        download_fns = {
+            'zip': (download_zip_file, (cleanup,)),
+            'tar': (download_tar_file, (cleanup,)),
+            'zst': (download_zst_file, (cleanup,)),
+            'file': (download_from_remote, ()),
+        }
+        all_jobs = [
+            (k,) + download_fns[kind] for kind, keys in buckets.items() for k in keys
+        ]
+
+        # create each destination directory once, rather than once per remote
+        download_dirs = set(
+            _download_dir(remotes[k], save_dir) for k in objs_to_download
+        )
+        for download_dir in download_dirs - {save_dir}:
+            os.makedirs(download_dir, exist_ok=True)
+
+        # downloads are network bound and independent of each other, so fetch
+        # them concurrently. Each job also extracts its own archive.
+        if all_jobs:
+            with ThreadPoolExecutor(
+                max_workers=min(MAX_DOWNLOAD_WORKERS, len(all_jobs))
+            ) as executor:
+                stop_event = threading.Event()
+                futures = {}
+                for k, download_fn, extra_args in all_jobs:
+                    print("> downloading {}".format(k))
+                    future = _submit(
+                        executor,
+                        stop_event,
+                        download_fn,
+                        remotes[k],
+                        save_dir,
+                        force_overwrite,
+                        *extra_args,
+                        skip_mkdir=True
+                    )
+                    futures[future] = k
+
+                _wait_for(futures, stop_event)
 
     if info_message is not None:
         print(info_message)
 
 
-class DownloadProgressBar(tqdm):
-    """Wrap `tqdm` to show download progress"""
+class _DownloadStopped(Exception):
+    """Raised in a worker when another job of its pool failed or was interrupted"""
+
+
+# stop events of the pools the current thread is working for. A worker of a
+# nested pool (e.g. fetching a byte range) also stops with its parent pool.
+_thread_state = threading.local()
+
+
+def _submit(executor, stop_event, fn, *args, **kwargs):
+    """Submit `fn(*args, **kwargs)` to `executor` as a job which can be stopped.
+
+    Args:
+        executor (ThreadPoolExecutor): Executor to run the job
+        stop_event (threading.Event): Event set by `_wait_for` when the job
+            should stop
+        fn (callable): Function to run
+
+    Returns:
+        future (concurrent.futures.Future): Future of the job
+
+    """
+    stop_events = getattr(_thread_state, 'stop_events', ()) + (stop_event,)
+
+    def run():
+        _thread_state.stop_events = stop_events
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _thread_state.stop_events = ()
+
+    return executor.submit(run)
+
+
+def _check_stopped():
+    """Raise `_DownloadStopped` if the job run by this thread should stop.
+
+    Called between the chunks of a transfer, so that running downloads stop
+    soon after another job of their pool fails or the user presses Ctrl-C.
+    """
+    for stop_event in getattr(_thread_state, 'stop_events', ()):
+        if stop_event.is_set():
+            raise _DownloadStopped()
+
+
+def _wait_for(futures, stop_event):
+    """Wait for all `futures` to finish, re-raising the first error.
+
+    If a future fails, or waiting is interrupted (e.g. by Ctrl-C), the
+    futures which have not started yet are cancelled, and `stop_event` is set
+    so that running jobs stop at their next chunk (see `_check_stopped`)
+    instead of being waited for by the executor.
+
+    Args:
+        futures (iterable): concurrent.futures.Future objects submitted
+            with `_submit`
+        stop_event (threading.Event): Event the futures were submitted with
+
+    """
+    try:
+        for future in as_completed(futures):
+            # re-raises any exception raised in the worker
+            future.result()
+    except BaseException:
+        stop_event.set()
+        for future in futures:
+            future.cancel()
+        raise
+
 
-    def update_to(self, b=1, bsize=1, tsize=None):
-        if tsize is not None:
-            self.total = tsize
-        self.update(b * bsize - self.n)
+# how `downloader` handles a remote, by (double) file suffix
+_SUFFIX_KINDS = {
+    '.zip': 'zip',
+    '.tar': 'tar',
+    '.tgz': 'tar',
+    '.tar.gz': 'tar',
+    '.zst': 'zst',
+    '.tzst': 'zst',
+}
 
 
-def download_from_remote(remote, save_dir, force_overwrite=False):
+@functools.lru_cache(maxsize=None)
+def _kind(filename):
+    """Classify a remote file by how `downloader` handles it.
+
+    Args:
+        filename (str): Name of the remote file
+
+    Returns:
+        kind (str): 'zip', 'tar' or 'zst' for compressed files, otherwise 'file'
+    """
+    suffixes = filename.lower().split('.')[1:]
+    # double suffixes such as '.tar.gz' take precedence over the last one
+    if len(suffixes) > 1:
+        kind = _SUFFIX_KINDS.get('.{}.{}'.format(*suffixes[-2:]))
+        if kind is not None:
+            return kind
+    if suffixes:
+        return _SUFFIX_KINDS.get('.' + suffixes[-1], 'file')
+    return 'file'
+
+
+def _download_dir(remote, save_dir):
+    if remote.destination_dir is None:
+        return save_dir
+    return os.path.join(save_dir, remote.destination_dir)
+
+
+def _is_downloaded(remote, save_dir):
+    """Check if a plain file remote is on disk and was already verified.
+
+    Archives are not considered downloaded, since their extracted contents
+    may have changed since they were verified.
+
+    Args:
+        remote (RemoteFileMetadata): Object containing download information
+        save_dir (str): Directory the file is saved to
+
+    Returns:
+        is_downloaded (bool): True if there is nothing to do for this remote
+    """
+    if _kind(remote.filename) != 'file':
+        return False
+    download_path = os.path.join(_download_dir(remote, save_dir), remote.filename)
+    return os.path.exists(download_path) and _has_valid_checksum_marker(
+        download_path, remote.checksum
+    )
+
+
+def download_from_remote(
+    remote, save_dir, force_overwrite=False, skip_mkdir=False, response=None
+):
     """Download a remote dataset into path
     Fetch a dataset pointed by remote's url, save into path using remote's
     filename and ensure its integrity based on the MD5 Checksum of the
@@ -108,57 +347,515 @@ def download_from_remote(remote, save_dir, force_overwrite=False):
         force_overwrite  (bool):
             If True, overwrite existing file with the downloaded file.
             If False, does not overwrite, but checks that checksum is consistent.
+            The check is skipped if the file was already verified and has not
+            been modified since, unless the environment variable
+            `MIRDATA_FORCE_CHECKSUM` is set to 1.
+        skip_mkdir (bool):
+            If True, assume the destination directory was already created.
+        response (requests.Response or None):
+            A streamed response already opened for `remote.url`, which is
+            used instead of requesting the file again. If None, the file is
+            requested here.
 
     Returns:
         file_path (str): Full path of the created file.
     """
-    if remote.destination_dir is None:
-        download_dir = save_dir
-    else:
-        download_dir = os.path.join(save_dir, remote.destination_dir)
-
-    if not os.path.exists(download_dir):
-        os.makedirs(download_dir)
+    download_dir = _download_dir(remote, save_dir)
+    if not skip_mkdir:
+        os.makedirs(download_dir, exist_ok=True)
 
+    algorithm, expected_checksum = _parse_checksum(remote.checksum)
     download_path = os.path.join(download_dir, remote.filename)
     if not os.path.exists(download_path) or force_overwrite:
+        _remove_checksum_marker(download_path)
         # If file doesn't exist or we want to overwrite, download it
-        with DownloadProgressBar(
-            unit='B', unit_scale=True, unit_divisor=1024, miniters=1
-        ) as t:
+        # downloads update the bar with byte counts directly; redraw it at
+        # most 4 times per second regardless of how many chunks are read
+        with tqdm(unit='B', unit_scale=True, unit_divisor=1024, mininterval=0.25) as t:
             try:
-                urllib.request.urlretrieve(
+                checksum = _download(
                     remote.url,
-                    filename=download_path,
-                    reporthook=t.update_to,
-                    data=None,
+                    download_path,
+                    t,
+                    resume=not force_overwrite,
+                    drop_cache=_kind(remote.filename) == 'file',
+                    algorithm=algorithm,
+                    response=response,
                 )
+            except _DownloadStopped:
+                raise
             except Exception as e:
-                error_msg = """
-                            mirdata failed to download the dataset from {}!
-                            Please try again in a few minutes.
-                            If this error persists, please raise an issue at
-                            https://github.com/mir-dataset-loaders/mirdata,
-                            and tag it with 'broken-link'.
-                            """.format(
-                    remote.url
-                )
-                print(error_msg)
+                _print_download_error(remote.url)
                 raise e
+    elif _has_valid_checksum_marker(download_path, remote.checksum):
+        return download_path
+    else:
+        checksum = _file_checksum(download_path, algorithm)
 
-    checksum = md5(download_path)
-    if remote.checksum != checksum:
+    if expected_checksum != checksum:
         raise IOError(
-            '{} has an MD5 checksum ({}) '
+            '{} has an {} checksum ({}) '
             'differing from expected ({}), '
-            'file may be corrupted.'.format(download_path, checksum, remote.checksum)
+            'file may be corrupted.'.format(
+                download_path, algorithm.upper(), checksum, expected_checksum
+            )
         )
+    _write_checksum_marker(download_path, remote.checksum)
     return download_path
 
 
-def download_zip_file(zip_remote, save_dir, force_overwrite, cleanup=True):
+def _print_download_error(url):
+    error_msg = """
+                mirdata failed to download the dataset from {}!
+                Please try again in a few minutes.
+                If this error persists, please raise an issue at
+                https://github.com/mir-dataset-loaders/mirdata,
+                and tag it with 'broken-link'.
+                """.format(
+        url
+    )
+    print(error_msg)
+
+
+def _parse_checksum(checksum):
+    """Split a checksum into the algorithm and the expected hash.
+
+    Args:
+        checksum (str): `<hash>` for md5, or `<algorithm>:<hash>`
+
+    Returns:
+        algorithm (str): name of the hash algorithm, e.g. 'md5' or 'blake3'
+        hash (str): expected hex digest
+
+    """
+    if ':' in checksum:
+        algorithm, expected_checksum = checksum.split(':', 1)
+        return algorithm.lower(), expected_checksum
+    return 'md5', checksum
+
+
+def _new_hash(algorithm):
+    """Create a hash object for `algorithm`.
+
+    Args:
+        algorithm (str): 'blake3' or any algorithm supported by `hashlib.new`
+
+    Returns:
+        hash_obj: Object with the `hashlib` interface
+
+    """
+    if algorithm == 'blake3':
+        if blake3 is None:
+            raise ImportError(
+                'In order to verify blake3 checksums you must have blake3 '
+                'installed. Please reinstall mirdata using '
+                '`pip install \'mirdata[blake3]\'`'
+            )
+        # hash large inputs on all cores
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    return hashlib.new(algorithm)
+
+
+def _file_checksum(file_path, algorithm):
+    if algorithm == 'md5':
+        return md5(file_path)
+    return hash_file(file_path, _new_hash(algorithm))
+
+
+def _checksum_marker_content(download_path, checksum):
+    return '{}:{}'.format(checksum, os.stat(download_path).st_mtime_ns)
+
+
+def _has_valid_checksum_marker(download_path, checksum):
+    """Check if `download_path` was verified against `checksum` and has not
+    been modified since.
+
+    Args:
+        download_path (str): Path to the downloaded file
+        checksum (str): Expected checksum of the file
+
+    Returns:
+        is_valid (bool): True if the file does not need to be verified again
+
+    """
+    if os.environ.get('MIRDATA_FORCE_CHECKSUM', '0') != '0':
+        return False
+
+    try:
+        with open(download_path + CHECKSUM_MARKER_SUFFIX, 'r') as fhandle:
+            marker = fhandle.read()
+    except IOError:
+        return False
+    return marker == _checksum_marker_content(download_path, checksum)
+
+
+def _write_checksum_marker(download_path, checksum):
+    """Record that `download_path` matches `checksum` in a sidecar file.
+
+    Args:
+        download_path (str): Path to the downloaded file
+        checksum (str): Checksum the file was verified against
+
+    """
+    try:
+        with open(download_path + CHECKSUM_MARKER_SUFFIX, 'w') as fhandle:
+            fhandle.write(_checksum_marker_content(download_path, checksum))
+    except IOError:
+        # the marker is only an optimization, verification still succeeded
+        pass
+
+
+def _remove_checksum_marker(download_path):
+    marker_path = download_path + CHECKSUM_MARKER_SUFFIX
+    if os.path.exists(marker_path):
+        os.remove(marker_path)
+
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _session():
+    """Get the HTTP session shared by all downloads.
+
+    Connections are kept alive and reused across files, and failed
+    connections are retried with an exponential backoff.
+
+    Returns:
+        session (requests.Session): the shared session
+    """
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_CONNECTIONS,
+                pool_maxsize=MAX_DOWNLOAD_WORKERS * RANGED_DOWNLOAD_WORKERS,
+                max_retries=Retry(total=5, backoff_factor=0.3),
+            )
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            # checksums are computed on the raw bytes of the files
+            session.headers['Accept-Encoding'] = 'identity'
+            _SESSION = session
+    return _SESSION
+
+
+def _download(
+    url,
+    download_path,
+    progress_bar,
+    resume=True,
+    drop_cache=False,
+    algorithm='md5',
+    response=None,
+):
+    """Download `url` to `download_path` and compute its hash.
+
+    Large files are fetched as concurrent byte ranges if the server supports
+    them, everything else as a single stream. Whether to use ranges is decided
+    from the headers of the streamed response, so that small files only need
+    one request.
+
+    Args:
+        url (str): URL of the remote file
+        download_path (str): Path to write the downloaded file to
+        progress_bar (tqdm): Progress bar updated with the number of bytes read
+        resume (bool): If True, resume a previously interrupted ranged download
+        drop_cache (bool): If True, the file is not read again right away, so
+            evict it from the page cache after a streamed download
+        algorithm (str): Name of the hash algorithm, see `_new_hash`
+        response (requests.Response or None): Streamed response already opened
+            for `url`. If None, `url` is requested here.
+
+    Returns:
+        hash (str): hex digest of the downloaded data
+
+    """
+    if response is None:
+        response = _session().get(url, stream=True)
+    with response:
+        response.raise_for_status()
+        size = _ranged_download_size(response.headers)
+        if size is None:
+            return _fetch_and_hash(
+                response, download_path, progress_bar, drop_cache, algorithm
+            )
+
+    # the response is closed without reading its body, the file is fetched
+    # in ranges instead
+    if _fetch_ranges(url, download_path, size, progress_bar, resume):
+        # ranges arrive out of order, so hash the complete file
+        return _file_checksum(download_path, algorithm)
+    with _session().get(url, stream=True) as response:
+        response.raise_for_status()
+        return _fetch_and_hash(
+            response, download_path, progress_bar, drop_cache, algorithm
+        )
+
+
+def _ranged_download_size(headers):
+    """Get the size of a remote file which should be fetched in byte ranges.
+
+    Args:
+        headers (dict): Response headers of the remote file
+
+    Returns:
+        size (int or None): Size of the file in bytes, or None if the server
+            does not accept byte ranges, the file is smaller than
+            `RANGED_DOWNLOAD_MIN_SIZE` or the platform has no `os.pwrite`
+
+    """
+    if not hasattr(os, 'pwrite'):
+        return None
+
+    accept_ranges = headers.get('Accept-Ranges', '')
+    content_length = headers.get('Content-Length')
+
+    if accept_ranges.lower() != 'bytes' or content_length is None:
+        return None
+    size = int(content_length)
+    if size <= RANGED_DOWNLOAD_MIN_SIZE:
+        return None
+    return size
+
+
+class _RangeNotSatisfied(Exception):
+    """Raised when a server answers a range request with the whole file"""
+
+
+def _fetch_ranges(url, download_path, size, progress_bar, resume=True):
+    """Download `url` as concurrent byte ranges.
+
+    Data is written to `download_path + PARTIAL_DOWNLOAD_SUFFIX`, and the
+    ranges which were completed are recorded in a manifest next to it. If the
+    download is interrupted, the next attempt only fetches the missing ranges.
+    The partial file is moved to `download_path` once it is complete.
+
+    Args:
+        url (str): URL of the remote file
+        download_path (str): Path to write the downloaded file to
+        size (int): Size of the remote file in bytes
+        progress_bar (tqdm): Progress bar updated with the number of bytes read
+        resume (bool): If True, keep the ranges completed by a previous attempt
+
+    Returns:
+        success (bool): False if the server does not honour range requests,
+            in which case nothing was written
+
+    """
+    part_path = download_path + PARTIAL_DOWNLOAD_SUFFIX
+    manifest_path = part_path + '.json'
+
+    completed = set()
+    if resume and os.path.exists(part_path):
+        completed = _read_range_manifest(manifest_path, url, size)
+
+    byte_ranges = [
+        (start, min(start + RANGED_DOWNLOAD_SEGMENT_SIZE, size) - 1)
+        for start in range(0, size, RANGED_DOWNLOAD_SEGMENT_SIZE)
+    ]
+    lock = threading.Lock()
+    progress_bar.total = size
+    progress_bar.update(sum(end - start + 1 for start, end in completed))
+
+    flags = os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+    if not completed:
+        flags |= os.O_TRUNC
+    fd = os.open(part_path, flags)
+
+    def fetch_range(byte_range):
+        start, end = byte_range
+        headers = {'Range': 'bytes={}-{}'.format(start, end)}
+        with _session().get(url, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise _RangeNotSatisfied(url)
+            offset = start
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                _check_stopped()
+                _pwrite_all(fd, chunk, offset)
+                offset += len(chunk)
+                with lock:
+                    progress_bar.update(len(chunk))
+
+        if offset != end + 1:
+            raise IOError(
+                'Incomplete download of bytes {}-{} from {}'.format(start, end, url)
+            )
+        with lock:
+            completed.add(byte_range)
+            _write_range_manifest(manifest_path, url, size, completed)
+
+    try:
+        if not completed:
+            _preallocate(fd, size)
+
+        stop_event = threading.Event()
+        with ThreadPoolExecutor(max_workers=RANGED_DOWNLOAD_WORKERS) as executor:
+            futures = [
+                _submit(executor, stop_event, fetch_range, byte_range)
+                for byte_range in byte_ranges
+                if byte_range not in completed
+            ]
+            _wait_for(futures, stop_event)
+    except _RangeNotSatisfied:
+        os.close(fd)
+        os.remove(part_path)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        progress_bar.reset()
+        return False
+    except Exception:
+        # keep the partial file and its manifest to resume from
+        os.close(fd)
+        raise
+
+    os.close(fd)
+    os.replace(part_path, download_path)
+    os.remove(manifest_path)
+    return True
+
+
+def _pwrite_all(fd, data, offset):
+    """Write all of `data` to `fd` at `offset`, retrying short writes.
+
+    Args:
+        fd (int): File descriptor
+        data (bytes): Data to write
+        offset (int): Position in the file to write `data` to
+
+    """
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def _preallocate(fd, size):
+    """Allocate `size` bytes on disk for `fd`, so that it is not fragmented.
+
+    Falls back to setting the size of the file if the platform or the
+    filesystem (e.g. ZFS) does not support preallocation.
+
+    Args:
+        fd (int): File descriptor
+        size (int): Size of the file in bytes
+
+    """
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            pass
+    os.ftruncate(fd, size)
+
+
+def _read_range_manifest(manifest_path, url, size):
+    """Read the byte ranges completed by a previous ranged download.
+
+    Args:
+        manifest_path (str): Path to the manifest
+        url (str): URL of the remote file
+        size (int): Size of the remote file in bytes
+
+    Returns:
+        completed (set): Set of completed (start, end) byte ranges. Empty if
+            the manifest is missing, unreadable or describes another download.
+
+    """
+    try:
+        with open(manifest_path, 'r') as fhandle:
+            manifest = json.load(fhandle)
+    except (IOError, ValueError):
+        return set()
+
+    if (
+        manifest.get('url') != url
+        or manifest.get('size') != size
+        or manifest.get('segment_size') != RANGED_DOWNLOAD_SEGMENT_SIZE
+    ):
+        return set()
+    return set(tuple(byte_range) for byte_range in manifest['completed'])
+
+
+def _write_range_manifest(manifest_path, url, size, completed):
+    with open(manifest_path, 'w') as fhandle:
+        json.dump(
+            {
+                'url': url,
+                'size': size,
+                'segment_size': RANGED_DOWNLOAD_SEGMENT_SIZE,
+                'completed': sorted(completed),
+            },
+            fhandle,
+        )
+
+
+def _fetch_and_hash(
+    response, download_path, progress_bar, drop_cache=False, algorithm='md5'
+):
+    """Stream `response` to `download_path`, computing its hash on the way.
+
+    The file is hashed while its bytes are written, so it does not need to
+    be read back from disk to verify its checksum. Data is written in
+    `DOWNLOAD_CHUNK_SIZE` blocks into a file preallocated to the size
+    announced by the server.
+
+    Args:
+        response (requests.Response): Streamed response of the remote file
+        download_path (str): Path to write the downloaded file to
+        progress_bar (tqdm): Progress bar updated with the number of bytes read
+        drop_cache (bool): If True, advise the kernel to evict the written
+            pages from the page cache
+        algorithm (str): Name of the hash algorithm, see `_new_hash`
+
+    Returns:
+        hash (str): hex digest of the downloaded data
+
+    """
+    hash_obj = _new_hash(algorithm)
+    content_length = response.headers.get('Content-Length')
+    fd = os.open(
+        download_path,
+        os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0),
+        0o666,
+    )
+    # a buffered file retries short writes, and chunks of the size of its
+    # buffer are written directly without being copied into it
+    with open(fd, 'wb', buffering=DOWNLOAD_CHUNK_SIZE) as fhandle:
+        if content_length is not None:
+            progress_bar.total = int(content_length)
+            if progress_bar.total > 0:
+                _preallocate(fd, progress_bar.total)
+
+        size = 0
+        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+            _check_stopped()
+            hash_obj.update(chunk)
+            fhandle.write(chunk)
+            size += len(chunk)
+            progress_bar.update(len(chunk))
+
+        # the server may have sent less than it announced
+        fhandle.truncate(size)
+        if drop_cache and hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    return hash_obj.hexdigest()
+
+
+def download_zip_file(
+    zip_remote, save_dir, force_overwrite, cleanup=True, skip_mkdir=False
+):
     """Download and unzip a zip file.
 
+    Zip files smaller than `MEM_EXTRACT_MAX_SIZE` are downloaded into memory
+    and extracted from there, unless `MEM_EXTRACT_MAX_FILES` zip files are
+    already held in memory by other workers. The archive is only written to
+    disk if `cleanup` is False.
+
     Args:
         zip_remote (RemoteFileMetadata):
             Object containing download information
@@ -168,11 +865,97 @@ def download_zip_file(zip_remote, save_dir, force_overwrite, cleanup=True):
             If True, overwrites existing files
         cleanup (bool):
             If True, remove zipfile after unziping. Default=False
+        skip_mkdir (bool):
+            If True, assume the destination directory was already created
     """
-    zip_download_path = download_from_remote(zip_remote, save_dir, force_overwrite)
+    download_dir = _download_dir(zip_remote, save_dir)
+    zip_path = os.path.join(download_dir, zip_remote.filename)
+    if not force_overwrite and os.path.exists(zip_path):
+        zip_download_path = download_from_remote(
+            zip_remote, save_dir, force_overwrite, skip_mkdir=skip_mkdir
+        )
+        unzip(zip_download_path, cleanup=cleanup)
+        return
+
+    if not skip_mkdir:
+        os.makedirs(download_dir, exist_ok=True)
+    try:
+        response = _session().get(zip_remote.url, stream=True)
+    except Exception as e:
+        _print_download_error(zip_remote.url)
+        raise e
+
+    # the size of the zip file is only known once it is requested, so the
+    # same response is either read into memory or streamed to disk
+    with response:
+        content_length = response.headers.get('Content-Length')
+        if (
+            response.ok
+            and content_length is not None
+            and int(content_length) <= MEM_EXTRACT_MAX_SIZE
+            and _MEM_EXTRACT_SLOTS.acquire(blocking=False)
+        ):
+            try:
+                _download_and_unzip_in_memory(zip_remote, zip_path, response, cleanup)
+            finally:
+                _MEM_EXTRACT_SLOTS.release()
+            return
+        zip_download_path = download_from_remote(
+            zip_remote, save_dir, force_overwrite, skip_mkdir=True, response=response
+        )
     unzip(zip_download_path, cleanup=cleanup)
 
 
+def _download_and_unzip_in_memory(zip_remote, zip_path, response, cleanup=True):
+    """Download a zip file into memory, verify it and extract it.
+
+    Args:
+        zip_remote (RemoteFileMetadata): Object containing download information
+        zip_path (str): Path the zip file would be downloaded to
+        response (requests.Response): Streamed response of `zip_remote.url`
+        cleanup (bool): If False, also write the zip file to `zip_path`,
+            otherwise remove any previously downloaded zip file there
+    """
+    algorithm, expected_checksum = _parse_checksum(zip_remote.checksum)
+    buffer = io.BytesIO()
+    hash_obj = _new_hash(algorithm)
+    with tqdm(unit='B', unit_scale=True, unit_divisor=1024, mininterval=0.25) as t:
+        try:
+            t.total = int(response.headers['Content-Length'])
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                _check_stopped()
+                hash_obj.update(chunk)
+                buffer.write(chunk)
+                t.update(len(chunk))
+        except _DownloadStopped:
+            raise
+        except Exception as e:
+            _print_download_error(zip_remote.url)
+            raise e
+
+    checksum = hash_obj.hexdigest()
+    if expected_checksum != checksum:
+        raise IOError(
+            'The zip file downloaded from {} has an {} checksum ({}) '
+            'differing from expected ({}), '
+            'file may be corrupted.'.format(
+                zip_remote.url, algorithm.upper(), checksum, expected_checksum
+            )
+        )
+
+    _remove_checksum_marker(zip_path)
+    if not cleanup:
+        with open(zip_path, 'wb') as fhandle:
+            fhandle.write(buffer.getbuffer())
+        _write_checksum_marker(zip_path, zip_remote.checksum)
+    elif os.path.exists(zip_path):
+        # left by an earlier download, e.g. when force_overwrite is True
+        os.remove(zip_path)
+
+    with zipfile.ZipFile(buffer, 'r') as zfile:
+        _extract_zip_members(zfile, os.path.dirname(zip_path) or os.curdir)
+
+
 def unzip(zip_path, cleanup=True):
     """Unzip a zip file inside it's current directory.
 
@@ -181,14 +964,97 @@ def unzip(zip_path, cleanup=True):
         cleanup (bool): If True, remove zipfile after unzipping. Default=False
 
     """
-    zfile = zipfile.ZipFile(zip_path, 'r')
-    zfile.extractall(os.path.dirname(zip_path))
-    zfile.close()
+    destination = os.path.dirname(zip_path) or os.curdir
+    unzip_command = shutil.which('unzip')
+    if libarchive is not None:
+        _libarchive_extract(zip_path, destination)
+    elif unzip_command is not None:
+        subprocess.check_call([unzip_command, '-q', '-o', zip_path, '-d', destination])
+    else:
+        _zipfile_extract(zip_path, destination)
     if cleanup:
         os.remove(zip_path)
+        _remove_checksum_marker(zip_path)
+
+
+class _MappedFile(mmap.mmap):
+    """Memory mapped file which zipfile accepts as a file object"""
+
+    def seekable(self):
+        return True
+
+
+def _zipfile_extract(zip_path, destination):
+    """Extract a zip file with zipfile, reading it through a memory map.
+
+    Compressed bytes are inflated straight from the page cache instead of
+    being copied into Python buffers first, and each member is written in
+    blocks of `EXTRACT_BUFFER_SIZE` bytes.
+
+    Args:
+        zip_path (str): Path to zip file
+        destination (str): Directory to extract the archive into
+    """
+    with open(zip_path, 'rb') as fhandle:
+        if hasattr(os, 'posix_fadvise'):
+            # let the kernel read ahead aggressively
+            os.posix_fadvise(fhandle.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        with _MappedFile(fhandle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with zipfile.ZipFile(mapped, 'r') as zfile:
+                _extract_zip_members(zfile, destination)
+
+
+def _extract_zip_members(zfile, destination):
+    """Write the members of an open zip file in blocks of `EXTRACT_BUFFER_SIZE`.
+
+    Args:
+        zfile (zipfile.ZipFile): Zip file opened for reading
+        destination (str): Directory to extract the archive into
+    """
+    for member in zfile.infolist():
+        target_path = _zip_member_path(member.filename, destination)
+        if target_path is None:
+            continue
+        if member.is_dir():
+            os.makedirs(target_path, exist_ok=True)
+            continue
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        with zfile.open(member) as source:
+            with open(target_path, 'wb') as target:
+                shutil.copyfileobj(source, target, EXTRACT_BUFFER_SIZE)
 
 
-def download_tar_file(tar_remote, save_dir, force_overwrite, cleanup=True):
+def _zip_member_path(filename, destination):
+    """Get the path a zip member is extracted to, the same way as zipfile.
+
+    Drive letters, empty, '.' and '..' components are removed so members
+    cannot be written outside of `destination`.
+
+    Args:
+        filename (str): Name of the member in the zip file
+        destination (str): Directory the archive is extracted into
+
+    Returns:
+        target_path (str or None): Path to write the member to, or None if
+            the member name has no valid components
+    """
+    arcname = filename.replace('/', os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = [
+        part
+        for part in arcname.split(os.path.sep)
+        if part not in ('', os.path.curdir, os.path.pardir)
+    ]
+    if not parts:
+        return None
+    return os.path.join(destination, *parts)
+
+
+def download_tar_file(
+    tar_remote, save_dir, force_overwrite, cleanup=True, skip_mkdir=False
+):
     """Download and untar a tar file.
 
     Args:
@@ -196,8 +1062,11 @@ def download_tar_file(tar_remote, save_dir, force_overwrite, cleanup=True):
         save_dir (str): Path to save downloaded file
         force_overwrite (bool): If True, overwrites existing files
         cleanup (bool): If True, remove tarfile after untarring. Default=False
+        skip_mkdir (bool): If True, assume the destination directory exists
     """
-    tar_download_path = download_from_remote(tar_remote, save_dir, force_overwrite)
+    tar_download_path = download_from_remote(
+        tar_remote, save_dir, force_overwrite, skip_mkdir=skip_mkdir
+    )
     untar(tar_download_path, cleanup=cleanup)
 
 
@@ -208,8 +1077,175 @@ def untar(tar_path, cleanup=True):
         tar_path (str): Path to tar file
         cleanup (bool): If True, remove tarfile after untarring. Default=False
     """
-    tfile = tarfile.open(tar_path, 'r')
-    tfile.extractall(os.path.dirname(tar_path))
-    tfile.close()
+    destination = os.path.dirname(tar_path) or os.curdir
+    gunzip_command = None
+    if tar_path.endswith(('.tar.gz', '.tgz')):
+        gunzip_command = _find_parallel_gunzip()
+
+    if gunzip_command is not None:
+        _untar_from_pipe(gunzip_command, tar_path, destination)
+    elif libarchive is not None:
+        _libarchive_extract(tar_path, destination)
+    else:
+        # read the archive forward once instead of seeking through it
+        with tarfile.open(tar_path, 'r|*') as tfile:
+            tfile.extractall(destination)
     if cleanup:
         os.remove(tar_path)
+        _remove_checksum_marker(tar_path)
+
+
+def download_zst_file(
+    zst_remote, save_dir, force_overwrite, cleanup=True, skip_mkdir=False
+):
+    """Download and decompress a zstandard compressed file or tar file.
+
+    Args:
+        zst_remote (RemoteFileMetadata): Object containing download information
+        save_dir (str): Path to save downloaded file
+        force_overwrite (bool): If True, overwrites existing files
+        cleanup (bool): If True, remove the .zst file after decompressing
+        skip_mkdir (bool): If True, assume the destination directory exists
+    """
+    zst_download_path = download_from_remote(
+        zst_remote, save_dir, force_overwrite, skip_mkdir=skip_mkdir
+    )
+    unzst(zst_download_path, cleanup=cleanup)
+
+
+def unzst(zst_path, cleanup=True):
+    """Decompress a zstandard compressed file inside it's current directory.
+
+    `.tar.zst` and `.tzst` files are untarred, other `.zst` files are
+    decompressed to the same path without the `.zst` extension.
+
+    Args:
+        zst_path (str): Path to the .zst file
+        cleanup (bool): If True, remove the .zst file after decompressing
+    """
+    destination = os.path.dirname(zst_path) or os.curdir
+    is_tar = zst_path.lower().endswith(('.tar.zst', '.tzst'))
+    zstd_command = shutil.which('zstd')
+
+    # accept the largest window size zstd can compress with (--long=31), both
+    # with the zstd command and with zstandard
+    if zstd_command is not None:
+        if is_tar:
+            _untar_from_pipe(zstd_command, zst_path, destination, ['--long=31'])
+        else:
+            subprocess.check_call(
+                [
+                    zstd_command,
+                    '-d',
+                    '-q',
+                    '-f',
+                    '--long=31',
+                    zst_path,
+                    '-o',
+                    zst_path[:-4],
+                ]
+            )
+    elif zstandard is not None:
+        dctx = zstandard.ZstdDecompressor(max_window_size=2 ** 31)
+        with open(zst_path, 'rb') as fhandle:
+            with dctx.stream_reader(fhandle, read_across_frames=True) as reader:
+                if is_tar:
+                    with tarfile.open(fileobj=reader, mode='r|') as tfile:
+                        tfile.extractall(destination)
+                else:
+                    with open(zst_path[:-4], 'wb') as target:
+                        shutil.copyfileobj(reader, target, EXTRACT_BUFFER_SIZE)
+    elif is_tar and libarchive is not None:
+        _libarchive_extract(zst_path, destination)
+    else:
+        raise ImportError(
+            'In order to decompress {} you must have the zstd command or the '
+            'zstandard package installed. Please install zstd, or reinstall '
+            'mirdata using `pip install \'mirdata[zstd]\'`'.format(zst_path)
+        )
+
+    if cleanup:
+        os.remove(zst_path)
+        _remove_checksum_marker(zst_path)
+
+
+def _find_parallel_gunzip():
+    """Find the first available command in `PARALLEL_GUNZIP_COMMANDS`.
+
+    Returns:
+        command (str or None): Path to the command, or None if none is installed
+    """
+    for command in PARALLEL_GUNZIP_COMMANDS:
+        command_path = shutil.which(command)
+        if command_path is not None:
+            return command_path
+    return None
+
+
+def _untar_from_pipe(command, tar_path, destination, options=()):
+    """Decompress `tar_path` with an external command and untar its output.
+
+    The command runs in its own process (using all cores for parallel
+    decompressors) while tarfile only parses the uncompressed stream.
+
+    Args:
+        command (str): Decompressor accepting `-d -c <file>`, e.g. pigz or zstd
+        tar_path (str): Path to the compressed tar file
+        destination (str): Directory to extract the archive into
+        options (list): Additional command line options of the decompressor
+    """
+    process = subprocess.Popen(
+        [command, '-d', '-c'] + list(options) + [tar_path], stdout=subprocess.PIPE
+    )
+    tar_error = None
+    try:
+        with tarfile.open(fileobj=process.stdout, mode='r|') as tfile:
+            tfile.extractall(destination)
+    except tarfile.TarError as e:
+        # if the decompressor failed, tarfile only sees an empty or truncated
+        # stream, so report the decompressor's failure instead
+        tar_error = e
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+    if returncode != 0:
+        raise IOError(
+            '{} failed to decompress {} (exit status {})'.format(
+                command, tar_path, returncode
+            )
+        ) from tar_error
+    if tar_error is not None:
+        raise tar_error
+
+
+def _libarchive_extract(archive_path, destination):
+    """Extract any archive format supported by libarchive.
+
+    Entries are written relative to `destination` rather than to the current
+    working directory, so this is safe to call from several threads.
+
+    Args:
+        archive_path (str): Path to the archive
+        destination (str): Directory to extract the archive into
+    """
+    # EXTRACT_SECURE_NODOTDOT rejects any '..' in the relocated entry paths,
+    # including one coming from a relative destination such as '../data'
+    destination = os.path.abspath(destination)
+    flags = (
+        libarchive.extract.EXTRACT_TIME
+        | libarchive.extract.EXTRACT_PERM
+        | libarchive.extract.EXTRACT_SECURE_NODOTDOT
+        | libarchive.extract.EXTRACT_SECURE_SYMLINKS
+    )
+    with libarchive.file_reader(archive_path) as archive:
+        libarchive.extract.extract_entries(
+            _relocate_entries(archive, destination), flags
+        )
+
+
+def _relocate_entries(archive, destination):
+    for entry in archive:
+        entry.pathname = os.path.join(destination, entry.pathname.lstrip('/'))
+        if entry.islnk:
+            entry.linkpath = os.path.join(destination, entry.linkpath.lstrip('/'))
+        yield entry
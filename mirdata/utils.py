@@ -25,12 +25,16 @@ Attributes:
 
 from collections import namedtuple
 import hashlib
+import mmap
 import os
 import json
 
 
 MIR_DATASETS_DIR = os.path.join(os.getenv('HOME', '/tmp'), 'mir_datasets')
 
+# number of bytes read at a time by `hash_file` when it cannot use mmap
+HASH_CHUNK_SIZE = 1024 * 1024
+
 
 def md5(file_path):
     """Get md5 hash of a file.
@@ -42,11 +46,36 @@ def md5(file_path):
         md5_hash (str): md5 hash of data in file_path
 
     """
-    hash_md5 = hashlib.md5()
+    return hash_file(file_path, hashlib.md5())
+
+
+def hash_file(file_path, hash_obj):
+    """Feed the contents of a file to a hash object.
+
+    Args:
+        file_path (str): File path
+        hash_obj: Object with the `hashlib` interface, e.g. `hashlib.sha256()`
+
+    Returns:
+        hash (str): hex digest of data in file_path
+
+    """
     with open(file_path, 'rb') as fhandle:
-        for chunk in iter(lambda: fhandle.read(4096), b''):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+        # hash the memory mapped file in a single call instead of in chunks
+        try:
+            data = mmap.mmap(fhandle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be memory mapped
+            return hash_obj.hexdigest()
+        except (OSError, OverflowError):
+            # the filesystem does not support mmap (e.g. some network or FUSE
+            # mounts), or the file does not fit in the address space
+            for chunk in iter(lambda: fhandle.read(HASH_CHUNK_SIZE), b''):
+                hash_obj.update(chunk)
+            return hash_obj.hexdigest()
+        with data:
+            hash_obj.update(data)
+    return hash_obj.hexdigest()
 
 
 def none_path_join(partial_path_list):
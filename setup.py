@@ -61,5 +61,8 @@ if __name__ == '__main__':
                 'sphinx_rtd_theme',
             ],
             'dali': ['dali-dataset==1.1'],
+            'libarchive': ['libarchive-c'],
+            'zstd': ['zstandard'],
+            'blake3': ['blake3'],
         },
     )
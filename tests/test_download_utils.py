@@ -1,12 +1,23 @@
 # -*- coding: utf-8 -*-
 
+from concurrent.futures import ThreadPoolExecutor
+import errno
+import gzip
+import importlib
+import io
 import os
 import shutil
 import sys
+import tarfile
+import threading
+import time
+import zipfile
 
 from mirdata import download_utils
 
 import pytest
+from pytest_localserver.http import WSGIServer
+from werkzeug.wrappers import Request, Response
 
 if sys.version_info.major == 3:
     builtin_module_name = 'builtins'
@@ -41,9 +52,38 @@ def mock_path(mocker, mock_file):
     return mocker.patch.object(Path, 'mkdir')
 
 
+@pytest.fixture
+def range_server(mocker):
+    """Server for tests/resources/remote.wav which honours byte ranges"""
+    with open('tests/resources/remote.wav', 'rb') as fhandle:
+        data = fhandle.read()
+    requested_ranges = []
+    methods = []
+
+    def app(environ, start_response):
+        request = Request(environ)
+        methods.append(request.method)
+        if 'Range' in request.headers:
+            requested_ranges.append(request.headers['Range'])
+        response = Response(data, mimetype='audio/wav').make_conditional(
+            request, accept_ranges=True, complete_length=len(data)
+        )
+        return response(environ, start_response)
+
+    mocker.patch.object(download_utils, 'RANGED_DOWNLOAD_MIN_SIZE', 0)
+    mocker.patch.object(download_utils, 'RANGED_DOWNLOAD_SEGMENT_SIZE', 10)
+    server = WSGIServer(application=app)
+    server.requested_ranges = requested_ranges
+    server.methods = methods
+    server.start()
+    yield server
+    server.stop()
+
+
 def test_downloader(mocker, mock_path, capsys):
     mock_zip = mocker.patch.object(download_utils, 'download_zip_file')
     mock_tar = mocker.patch.object(download_utils, 'download_tar_file')
+    mock_zst = mocker.patch.object(download_utils, 'download_zst_file')
     mock_file = mocker.patch.object(download_utils, 'download_from_remote')
 
     zip_remote = download_utils.RemoteFileMetadata(
@@ -57,46 +97,56 @@ def test_downloader(mocker, mock_path, capsys):
         filename='remote.txt', url='a', checksum=('1234'), destination_dir=None
     )
 
+    zst_remote = download_utils.RemoteFileMetadata(
+        filename='remote.tar.zst', url='a', checksum=('1234'), destination_dir=None
+    )
+
     # Zip only
     download_utils.downloader('a', remotes={'b': zip_remote})
-    mock_zip.assert_called_once_with(zip_remote, 'a', False, True)
+    mock_zip.assert_called_once_with(zip_remote, 'a', False, True, skip_mkdir=True)
     mocker.resetall()
 
     # tar only
     download_utils.downloader('a', remotes={'b': tar_remote})
-    mock_tar.assert_called_once_with(tar_remote, 'a', False, True)
+    mock_tar.assert_called_once_with(tar_remote, 'a', False, True, skip_mkdir=True)
     mocker.resetall()
 
     # file only
     download_utils.downloader('a', remotes={'b': file_remote})
-    mock_file.assert_called_once_with(file_remote, 'a', False)
+    mock_file.assert_called_once_with(file_remote, 'a', False, skip_mkdir=True)
     mocker.resetall()
 
     # zip and tar
     download_utils.downloader('a', remotes={'b': zip_remote, 'c': tar_remote})
-    mock_zip.assert_called_once_with(zip_remote, 'a', False, True)
-    mock_tar.assert_called_once_with(tar_remote, 'a', False, True)
+    mock_zip.assert_called_once_with(zip_remote, 'a', False, True, skip_mkdir=True)
+    mock_tar.assert_called_once_with(tar_remote, 'a', False, True, skip_mkdir=True)
     mocker.resetall()
 
     # zip and file
     download_utils.downloader('a', remotes={'b': zip_remote, 'c': file_remote})
-    mock_zip.assert_called_once_with(zip_remote, 'a', False, True)
-    mock_file.assert_called_once_with(file_remote, 'a', False)
+    mock_zip.assert_called_once_with(zip_remote, 'a', False, True, skip_mkdir=True)
+    mock_file.assert_called_once_with(file_remote, 'a', False, skip_mkdir=True)
     mocker.resetall()
 
     # tar and file
     download_utils.downloader('a', remotes={'b': tar_remote, 'c': file_remote})
-    mock_tar.assert_called_once_with(tar_remote, 'a', False, True)
-    mock_file.assert_called_once_with(file_remote, 'a', False)
+    mock_tar.assert_called_once_with(tar_remote, 'a', False, True, skip_mkdir=True)
+    mock_file.assert_called_once_with(file_remote, 'a', False, skip_mkdir=True)
     mocker.resetall()
 
     # zip and tar and file
     download_utils.downloader(
         'a', remotes={'b': zip_remote, 'c': tar_remote, 'd': file_remote}
     )
-    mock_zip.assert_called_once_with(zip_remote, 'a', False, True)
-    mock_file.assert_called_once_with(file_remote, 'a', False)
-    mock_tar.assert_called_once_with(tar_remote, 'a', False, True)
+    mock_zip.assert_called_once_with(zip_remote, 'a', False, True, skip_mkdir=True)
+    mock_file.assert_called_once_with(file_remote, 'a', False, skip_mkdir=True)
+    mock_tar.assert_called_once_with(tar_remote, 'a', False, True, skip_mkdir=True)
+    mocker.resetall()
+
+    # zst and file
+    download_utils.downloader('a', remotes={'b': zst_remote, 'c': file_remote})
+    mock_zst.assert_called_once_with(zst_remote, 'a', False, True, skip_mkdir=True)
+    mock_file.assert_called_once_with(file_remote, 'a', False, skip_mkdir=True)
     mocker.resetall()
 
     # test partial download
@@ -105,8 +155,8 @@ def test_downloader(mocker, mock_path, capsys):
         remotes={'b': zip_remote, 'c': tar_remote, 'd': file_remote},
         partial_download=['b', 'd'],
     )
-    mock_zip.assert_called_once_with(zip_remote, 'a', False, True)
-    mock_file.assert_called_once_with(file_remote, 'a', False)
+    mock_zip.assert_called_once_with(zip_remote, 'a', False, True, skip_mkdir=True)
+    mock_file.assert_called_once_with(file_remote, 'a', False, skip_mkdir=True)
     mocker.resetall()
 
     # test bad type partial download
@@ -131,6 +181,168 @@ def test_downloader(mocker, mock_path, capsys):
     assert captured.out == "I am a message!\n"
 
 
+@pytest.mark.parametrize(
+    'filename,expected_kind',
+    [
+        ('remote.zip', 'zip'),
+        ('remote.ZIP', 'zip'),
+        ('remote.tar.gz', 'tar'),
+        ('remote.tgz', 'tar'),
+        ('remote.tar', 'tar'),
+        ('remote.txt', 'file'),
+        ('remote.csv.gz', 'file'),
+        ('remote.tar.zst', 'zst'),
+        ('remote.tzst', 'zst'),
+        ('remote.csv.zst', 'zst'),
+        ('remote', 'file'),
+        ('zip', 'file'),
+        ('remote.gz.txt', 'file'),
+        ('The Beatles Annotations.tar.gz', 'tar'),
+    ],
+)
+def test_kind(filename, expected_kind):
+    assert download_utils._kind(filename) == expected_kind
+
+
+def test_downloader_creates_destination_dirs(mocker, tmpdir):
+    mock_file = mocker.patch.object(download_utils, 'download_from_remote')
+    mock_makedirs = mocker.spy(download_utils.os, 'makedirs')
+    save_dir = str(tmpdir)
+
+    remotes = {
+        k: download_utils.RemoteFileMetadata(
+            filename='{}.txt'.format(k),
+            url='a',
+            checksum=('1234'),
+            destination_dir=destination_dir,
+        )
+        for k, destination_dir in [('b', None), ('c', 'sub'), ('d', 'sub')]
+    }
+    download_utils.downloader(save_dir, remotes=remotes)
+
+    assert os.path.isdir(os.path.join(save_dir, 'sub'))
+    # once for save_dir, once for the shared 'sub' directory
+    assert mock_makedirs.call_count == 2
+    assert mock_file.call_count == 3
+
+
+def test_downloader_skips_verified_files(httpserver, tmpdir, mocker):
+    httpserver.serve_content(open('tests/resources/remote.wav').read())
+    mock_file = mocker.spy(download_utils, 'download_from_remote')
+
+    file_remote = download_utils.RemoteFileMetadata(
+        filename='remote.wav',
+        url=httpserver.url,
+        checksum=('3f77d0d69dc41b3696f074ad6bf2852f'),
+        destination_dir=None,
+    )
+
+    download_utils.downloader(str(tmpdir), remotes={'b': file_remote})
+    assert mock_file.call_count == 1
+
+    download_utils.downloader(str(tmpdir), remotes={'b': file_remote})
+    assert mock_file.call_count == 1
+
+    download_utils.downloader(
+        str(tmpdir), remotes={'b': file_remote}, force_overwrite=True
+    )
+    assert mock_file.call_count == 2
+
+
+def test_downloader_raises_worker_error(mocker, mock_path):
+    mock_file = mocker.patch.object(download_utils, 'download_from_remote')
+    mock_file.side_effect = IOError('checksum mismatch')
+
+    file_remote = download_utils.RemoteFileMetadata(
+        filename='remote.txt', url='a', checksum=('1234'), destination_dir=None
+    )
+
+    with pytest.raises(IOError):
+        download_utils.downloader('a', remotes={'b': file_remote})
+
+
+def test_downloader_cancels_queued_jobs_on_error(mocker, mock_path):
+    mocker.patch.object(download_utils, 'MAX_DOWNLOAD_WORKERS', 1)
+    mock_file = mocker.patch.object(download_utils, 'download_from_remote')
+
+    def download(remote, *args, **kwargs):
+        if remote.filename == 'remote0.txt':
+            raise IOError('checksum mismatch')
+        time.sleep(0.1)
+
+    mock_file.side_effect = download
+
+    remotes = {
+        str(i): download_utils.RemoteFileMetadata(
+            filename='remote{}.txt'.format(i),
+            url='a',
+            checksum=('1234'),
+            destination_dir=None,
+        )
+        for i in range(10)
+    }
+
+    with pytest.raises(IOError):
+        download_utils.downloader('a', remotes=remotes)
+    assert mock_file.call_count < len(remotes)
+
+
+def test_downloader_stops_running_jobs_on_error(mocker, mock_path):
+    mocker.patch.object(download_utils, 'MAX_DOWNLOAD_WORKERS', 2)
+    mock_file = mocker.patch.object(download_utils, 'download_from_remote')
+    stopped = []
+
+    def download(remote, *args, **kwargs):
+        if remote.filename == 'remote0.txt':
+            time.sleep(0.1)
+            raise IOError('checksum mismatch')
+        # a long transfer, checking whether to stop between chunks
+        try:
+            for _ in range(100):
+                download_utils._check_stopped()
+                time.sleep(0.05)
+        except download_utils._DownloadStopped:
+            stopped.append(remote.filename)
+            raise
+
+    mock_file.side_effect = download
+    remotes = {
+        str(i): download_utils.RemoteFileMetadata(
+            filename='remote{}.txt'.format(i),
+            url='a',
+            checksum=('1234'),
+            destination_dir=None,
+        )
+        for i in range(2)
+    }
+
+    start = time.time()
+    with pytest.raises(IOError):
+        download_utils.downloader('a', remotes=remotes)
+    assert stopped == ['remote1.txt']
+    assert time.time() - start < 2
+
+
+def test_nested_jobs_stop_with_parent():
+    parent_event = threading.Event()
+    child_event = threading.Event()
+
+    def fetch_range():
+        parent_event.set()
+        download_utils._check_stopped()
+
+    def download():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return download_utils._submit(executor, child_event, fetch_range).result()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = download_utils._submit(executor, parent_event, download)
+        with pytest.raises(download_utils._DownloadStopped):
+            future.result()
+    # jobs submitted from the main thread are not stopped
+    download_utils._check_stopped()
+
+
 def test_download_from_remote(httpserver, tmpdir):
     httpserver.serve_content(open('tests/resources/remote.wav').read())
 
@@ -144,6 +356,250 @@ def test_download_from_remote(httpserver, tmpdir):
     download_path = download_utils.download_from_remote(TEST_REMOTE, str(tmpdir))
     expected_download_path = os.path.join(str(tmpdir), 'remote.wav')
     assert expected_download_path == download_path
+    # small files are downloaded in a single request
+    assert [request.method for request in httpserver.requests] == ['GET']
+
+
+def test_download_from_remote_hashes_while_streaming(httpserver, tmpdir, mocker):
+    httpserver.serve_content(open('tests/resources/remote.wav').read())
+    mock_md5 = mocker.patch.object(download_utils, 'md5')
+
+    TEST_REMOTE = download_utils.RemoteFileMetadata(
+        filename='remote.wav',
+        url=httpserver.url,
+        checksum=('3f77d0d69dc41b3696f074ad6bf2852f'),
+        destination_dir=None,
+    )
+
+    download_utils.download_from_remote(TEST_REMOTE, str(tmpdir))
+    mock_md5.assert_not_called()
+
+
+def test_download_from_remote_drops_cache_for_files(httpserver, tmpdir, mocker):
+    httpserver.serve_content(open('tests/resources/remote.wav').read())
+    mock_fetch = mocker.spy(download_utils, '_fetch_and_hash')
+
+    TEST_REMOTE = download_utils.RemoteFileMetadata(
+        filename='remote.wav',
+        url=httpserver.url,
+        checksum=('3f77d0d69dc41b3696f074ad6bf2852f'),
+        destination_dir=None,
+    )
+    download_utils.download_from_remote(TEST_REMOTE, str(tmpdir))
+    assert mock_fetch.call_args[0][3] is True
+    mocker.resetall()
+
+    # archives are extracted right after downloading, so keep them cached
+    httpserver.serve_content(open('tests/resources/remote.zip', 'rb').read())
+    TEST_REMOTE = download_utils.RemoteFileMetadata(
+        filename='remote.zip',
+        url=httpserver.url,
+        checksum=download_utils.md5('tests/resources/remote.zip'),
+        destination_dir=None,
+    )
+    download_utils.download_from_remote(TEST_REMOTE, str(tmpdir))
+    assert mock_fetch.call_args[0][3] is False
+
+
+def test_download_from_remote_checksum_marker(httpserver, tmpdir, mocker):
+    httpserver.serve_content(open('tests/resources/remote.wav').read())
+    mock_md5 = mocker.patch.object(download_utils, 'md5')
+    mock_md5.return_value = '3f77d0d69dc41b3696f074ad6bf2852f'
+
+    TEST_REMOTE = download_utils.RemoteFileMetadata(
+        filename='remote.wav',
+        url=httpserver.url,
+        checksum=('3f77d0d69dc41b3696f074ad6bf2852f'),
+        destination_dir=None,
+    )
+    download_path = os.path.join(str(tmpdir), 'remote.wav')
+    marker_path = download_path + download_utils.CHECKSUM_MARKER_SUFFIX
+
+    download_utils.download_from_remote(TEST_REMOTE, str(tmpdir))
+    assert os.path.exists(marker_path)
+
+    # a verified, unmodified file is not hashed again
+    download_utils.download_from_remote(TEST_REMOTE, str(tmpdir))
+    mock_md5.assert_not_called()
+
+    # the check can be forced with an environment variable
+    mocker.patch.dict(os.environ, {'MIRDATA_FORCE_CHECKSUM': '1'})
+    download_utils.download_from_remote(TEST_REMOTE, str(tmpdir))
+    mock_md5.assert_called_once_with(download_path)
+    mocker.resetall()
+    mocker.patch.dict(os.environ, {'MIRDATA_FORCE_CHECKSUM': '0'})
+
+    # a modified file is hashed again
+    stat = os.stat(download_path)
+    os.utime(download_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    download_utils.download_from_remote(TEST_REMOTE, str(tmpdir))
+    mock_md5.assert_called_once_with(download_path)
+
+
+def test_download_from_remote_bad_checksum(httpserver, tmpdir):
+    httpserver.serve_content(open('tests/resources/remote.wav').read())
+
+    TEST_REMOTE = download_utils.RemoteFileMetadata(
+        filename='remote.wav',
+        url=httpserver.url,
+        checksum=('1234'),
+        destination_dir=None,
+    )
+
+    with pytest.raises(IOError):
+        download_utils.download_from_remote(TEST_REMOTE, str(tmpdir))
+
+
+def test_download_from_remote_ranges(range_server, tmpdir):
+    TEST_REMOTE = download_utils.RemoteFileMetadata(
+        filename='remote.wav',
+        url=range_server.url,
+        checksum=('3f77d0d69dc41b3696f074ad6bf2852f'),
+        destination_dir=None,
+    )
+
+    download_path = download_utils.download_from_remote(TEST_REMOTE, str(tmpdir))
+    assert len(range_server.requested_ranges) == 10
+    assert 'bytes=90-93' in range_server.requested_ranges
+    assert 'HEAD' not in range_server.methods
+    assert not os.path.exists(download_path + download_utils.PARTIAL_DOWNLOAD_SUFFIX)
+
+
+def test_download_from_remote_resumes_ranges(range_server, tmpdir):
+    TEST_REMOTE = download_utils.RemoteFileMetadata(
+        filename='remote.wav',
+        url=range_server.url,
+        checksum=('3f77d0d69dc41b3696f074ad6bf2852f'),
+        destination_dir=None,
+    )
+
+    # simulate a download interrupted after the first 90 bytes
+    with open('tests/resources/remote.wav', 'rb') as fhandle:
+        data = fhandle.read()
+    part_path = os.path.join(str(tmpdir), 'remote.wav.part')
+    with open(part_path, 'wb') as fhandle:
+        fhandle.write(data[:90] + b'\0' * 4)
+    download_utils._write_range_manifest(
+        part_path + '.json',
+        range_server.url,
+        len(data),
+        set((start, start + 9) for start in range(0, 90, 10)),
+    )
+
+    download_utils.download_from_remote(TEST_REMOTE, str(tmpdir))
+    assert range_server.requested_ranges == ['bytes=90-93']
+
+
+def test_download_from_remote_ranges_not_honoured(tmpdir, mocker):
+    with open('tests/resources/remote.wav', 'rb') as fhandle:
+        data = fhandle.read()
+
+    def app(environ, start_response):
+        # advertises byte ranges but always sends the whole file
+        response = Response(data, headers={'Accept-Ranges': 'bytes'})
+        return response(environ, start_response)
+
+    mocker.patch.object(download_utils, 'RANGED_DOWNLOAD_MIN_SIZE', 0)
+    mock_fetch = mocker.spy(download_utils, '_fetch_and_hash')
+    server = WSGIServer(application=app)
+    server.start()
+
+    TEST_REMOTE = download_utils.RemoteFileMetadata(
+        filename='remote.wav',
+        url=server.url,
+        checksum=('3f77d0d69dc41b3696f074ad6bf2852f'),
+        destination_dir=None,
+    )
+    download_path = download_utils.download_from_remote(TEST_REMOTE, str(tmpdir))
+    server.stop()
+
+    assert mock_fetch.call_count == 1
+    assert not os.path.exists(download_path + download_utils.PARTIAL_DOWNLOAD_SUFFIX)
+
+
+def test_download_from_remote_preallocate_not_supported(range_server, tmpdir, mocker):
+    if not hasattr(os, 'posix_fallocate'):
+        pytest.skip('posix_fallocate is not available')
+    mocker.patch.object(
+        os, 'posix_fallocate', side_effect=OSError(errno.EOPNOTSUPP, 'not supported')
+    )
+    TEST_REMOTE = download_utils.RemoteFileMetadata(
+        filename='remote.wav',
+        url=range_server.url,
+        checksum=('3f77d0d69dc41b3696f074ad6bf2852f'),
+        destination_dir=None,
+    )
+
+    # both the ranged and the streamed download
+    download_utils.download_from_remote(TEST_REMOTE, str(tmpdir))
+    mocker.patch.object(download_utils, 'RANGED_DOWNLOAD_MIN_SIZE', 1 << 30)
+    download_utils.download_from_remote(TEST_REMOTE, str(tmpdir), force_overwrite=True)
+
+
+def test_pwrite_all_retries_short_writes(tmpdir, mocker):
+    if not hasattr(os, 'pwrite'):
+        pytest.skip('pwrite is not available')
+    pwrite = os.pwrite
+    mocker.patch.object(
+        os, 'pwrite', side_effect=lambda fd, data, offset: pwrite(fd, data[:3], offset)
+    )
+
+    path = os.path.join(str(tmpdir), 'file')
+    fd = os.open(path, os.O_RDWR | os.O_CREAT)
+    try:
+        download_utils._pwrite_all(fd, b'0123456789', 2)
+    finally:
+        os.close(fd)
+    with open(path, 'rb') as fhandle:
+        assert fhandle.read() == b'\x00\x000123456789'
+
+
+def test_session_is_shared():
+    session = download_utils._session()
+    assert session is download_utils._session()
+
+    adapter = session.get_adapter('https://zenodo.org')
+    assert adapter.max_retries.total == 5
+    assert session.headers['Accept-Encoding'] == 'identity'
+
+
+@pytest.mark.parametrize(
+    'checksum',
+    [
+        '3f77d0d69dc41b3696f074ad6bf2852f',
+        'md5:3f77d0d69dc41b3696f074ad6bf2852f',
+        'sha256:877922ede38c1f8b80e0af60a37d8ac123a77ffa1cb689ece31a9e3e487f4863',
+        'blake3:07640e180adae3cea63921f5cae784c59c4a45a665440978d544cc0425c3b94a',
+    ],
+)
+def test_download_from_remote_checksum_algorithms(httpserver, tmpdir, checksum):
+    if checksum.startswith('blake3:'):
+        pytest.importorskip('blake3')
+    httpserver.serve_content(open('tests/resources/remote.wav').read())
+
+    TEST_REMOTE = download_utils.RemoteFileMetadata(
+        filename='remote.wav',
+        url=httpserver.url,
+        checksum=checksum,
+        destination_dir=None,
+    )
+
+    # verified while streaming
+    download_utils.download_from_remote(TEST_REMOTE, str(tmpdir))
+    # verified from disk
+    os.remove(os.path.join(str(tmpdir), 'remote.wav.md5ok'))
+    download_utils.download_from_remote(TEST_REMOTE, str(tmpdir))
+
+    with pytest.raises(IOError):
+        download_utils.download_from_remote(
+            TEST_REMOTE._replace(checksum=checksum[:-4] + '0000'), str(tmpdir)
+        )
+
+
+def test_new_hash_without_blake3(mocker):
+    mocker.patch.object(download_utils, 'blake3', None)
+    with pytest.raises(ImportError):
+        download_utils._new_hash('blake3')
 
 
 def test_download_from_remote_destdir(httpserver, tmpdir):
@@ -182,6 +638,86 @@ def test_unzip():
     os.remove(expected_file_location)
 
 
+@pytest.mark.parametrize(
+    'error',
+    [
+        "OSError('libarchive.so: cannot open shared object file')",
+        "AttributeError('undefined symbol: archive_version_number')",
+    ],
+)
+def test_import_without_libarchive_library(tmpdir, mocker, error):
+    # the python package is installed, but loading the C library fails
+    package_dir = os.path.join(str(tmpdir), 'libarchive')
+    os.makedirs(package_dir)
+    with open(os.path.join(package_dir, '__init__.py'), 'w') as fhandle:
+        fhandle.write('raise {}\n'.format(error))
+    mocker.patch.object(sys, 'path', [str(tmpdir)] + sys.path)
+    mocker.patch.dict(sys.modules)
+    for name in list(sys.modules):
+        if name == 'libarchive' or name.startswith('libarchive.'):
+            del sys.modules[name]
+
+    try:
+        importlib.reload(download_utils)
+        assert download_utils.libarchive is None
+    finally:
+        mocker.stopall()
+        importlib.reload(download_utils)
+
+
+def test_unzip_without_libarchive(mocker):
+    mocker.patch.object(download_utils, 'libarchive', None)
+    test_unzip()
+
+
+def test_unzip_with_zipfile(mocker):
+    mocker.patch.object(download_utils, 'libarchive', None)
+    mocker.patch.object(download_utils.shutil, 'which', return_value=None)
+    test_unzip()
+
+
+@pytest.mark.skipif(download_utils.libarchive is None, reason='needs libarchive')
+@pytest.mark.parametrize(
+    'archive, extract_fn, extracted_file',
+    [
+        ('file.zip', 'unzip', 'file.txt'),
+        ('file.tar.gz', 'untar', os.path.join('file', 'file.txt')),
+    ],
+)
+def test_libarchive_extract_relative_parent_dir(
+    tmpdir, monkeypatch, mocker, archive, extract_fn, extracted_file
+):
+    mocker.patch.object(download_utils, 'PARALLEL_GUNZIP_COMMANDS', [])
+    mocker.patch.object(download_utils.shutil, 'which', return_value=None)
+    os.makedirs(os.path.join(str(tmpdir), 'data'))
+    os.makedirs(os.path.join(str(tmpdir), 'cwd'))
+    shutil.copy(
+        os.path.join('tests', 'resources', archive),
+        os.path.join(str(tmpdir), 'data', archive),
+    )
+    monkeypatch.chdir(os.path.join(str(tmpdir), 'cwd'))
+
+    getattr(download_utils, extract_fn)(os.path.join('..', 'data', archive))
+    assert os.path.exists(os.path.join(str(tmpdir), 'data', extracted_file))
+
+
+def test_zipfile_extract_member_paths(tmpdir):
+    zip_path = os.path.join(str(tmpdir), 'archive', 'members.zip')
+    os.makedirs(os.path.dirname(zip_path))
+    with zipfile.ZipFile(zip_path, 'w') as zfile:
+        zfile.writestr('sub/', '')
+        zfile.writestr('sub/a.txt', 'a')
+        zfile.writestr('../b.txt', 'b')
+        zfile.writestr('/c.txt', 'c')
+
+    download_utils._zipfile_extract(zip_path, os.path.dirname(zip_path))
+    with open(os.path.join(str(tmpdir), 'archive', 'sub', 'a.txt')) as fhandle:
+        assert fhandle.read() == 'a'
+    assert os.path.exists(os.path.join(str(tmpdir), 'archive', 'b.txt'))
+    assert os.path.exists(os.path.join(str(tmpdir), 'archive', 'c.txt'))
+    assert not os.path.exists(os.path.join(str(tmpdir), 'b.txt'))
+
+
 def test_untar():
     download_utils.untar('tests/resources/file.tar.gz', cleanup=False)
     expected_file_location = os.path.join('tests', 'resources', 'file', 'file.txt')
@@ -189,21 +725,239 @@ def test_untar():
     os.remove(expected_file_location)
 
 
+def test_untar_without_libarchive(mocker):
+    mocker.patch.object(download_utils, 'libarchive', None)
+    mocker.patch.object(download_utils, 'PARALLEL_GUNZIP_COMMANDS', [])
+    test_untar()
+
+
+def test_untar_with_gunzip_command(mocker):
+    # gzip accepts the same arguments as the parallel decompressors
+    mocker.patch.object(download_utils, 'PARALLEL_GUNZIP_COMMANDS', ['gzip'])
+    mock_libarchive = mocker.patch.object(download_utils, '_libarchive_extract')
+    test_untar()
+    mock_libarchive.assert_not_called()
+
+
+def test_untar_gunzip_command_fails(tmpdir):
+    tar_path = os.path.join(str(tmpdir), 'broken.tar.gz')
+    with open(tar_path, 'wb') as fhandle:
+        fhandle.write(b'not a gzip file')
+
+    with pytest.raises(IOError, match='gzip failed') as excinfo:
+        download_utils._untar_from_pipe('gzip', tar_path, str(tmpdir))
+    assert isinstance(excinfo.value.__cause__, tarfile.ReadError)
+
+
+def test_untar_from_pipe_not_a_tar(tmpdir):
+    tar_path = os.path.join(str(tmpdir), 'file.txt.gz')
+    with gzip.open(tar_path, 'wb') as fhandle:
+        fhandle.write(b'not a tar file')
+
+    # the decompressor succeeded, so the error comes from tarfile
+    with pytest.raises(tarfile.ReadError):
+        download_utils._untar_from_pipe('gzip', tar_path, str(tmpdir))
+
+
+def test_unzst_tar(tmpdir, mocker):
+    zstandard = pytest.importorskip('zstandard')
+    mocker.patch.object(download_utils.shutil, 'which', return_value=None)
+
+    tar_path = os.path.join(str(tmpdir), 'file.tar')
+    with tarfile.open(tar_path, 'w') as tfile:
+        tfile.add('tests/resources/remote.wav', arcname='file/remote.wav')
+    zst_path = tar_path + '.zst'
+    with open(tar_path, 'rb') as source, open(zst_path, 'wb') as target:
+        zstandard.ZstdCompressor().copy_stream(source, target)
+    os.remove(tar_path)
+
+    download_utils.unzst(zst_path)
+    assert os.path.exists(os.path.join(str(tmpdir), 'file', 'remote.wav'))
+    assert not os.path.exists(zst_path)
+
+
+def test_unzst_file(tmpdir, mocker):
+    zstandard = pytest.importorskip('zstandard')
+    mocker.patch.object(download_utils.shutil, 'which', return_value=None)
+
+    zst_path = os.path.join(str(tmpdir), 'file.txt.zst')
+    with open(zst_path, 'wb') as fhandle:
+        fhandle.write(zstandard.ZstdCompressor().compress(b'file'))
+
+    download_utils.unzst(zst_path, cleanup=False)
+    with open(os.path.join(str(tmpdir), 'file.txt'), 'rb') as fhandle:
+        assert fhandle.read() == b'file'
+    assert os.path.exists(zst_path)
+
+
+@pytest.mark.parametrize('backend', ['zstd', 'zstandard'])
+@pytest.mark.parametrize('filename', ['file.tar.zst', 'file.txt.zst'])
+def test_unzst_long_window(tmpdir, mocker, backend, filename):
+    zstandard = pytest.importorskip('zstandard')
+    if backend == 'zstd':
+        if shutil.which('zstd') is None:
+            pytest.skip('zstd is not installed')
+    else:
+        mocker.patch.object(download_utils.shutil, 'which', return_value=None)
+
+    if filename.endswith('.tar.zst'):
+        data = io.BytesIO()
+        with tarfile.open(fileobj=data, mode='w') as tfile:
+            tfile.add('tests/resources/remote.wav', arcname='file/remote.wav')
+        data = data.getvalue()
+        extracted_path = os.path.join(str(tmpdir), 'file', 'remote.wav')
+    else:
+        data = b'file'
+        extracted_path = os.path.join(str(tmpdir), 'file.txt')
+
+    # as compressed by `zstd --long=31` from a stream, whose frames require
+    # a 2 GiB window
+    params = zstandard.ZstdCompressionParameters.from_level(
+        3, window_log=31, enable_ldm=True, write_content_size=False
+    )
+    zst_path = os.path.join(str(tmpdir), filename)
+    with open(zst_path, 'wb') as fhandle:
+        with zstandard.ZstdCompressor(compression_params=params).stream_writer(
+            fhandle
+        ) as writer:
+            writer.write(data)
+
+    download_utils.unzst(zst_path)
+    assert os.path.exists(extracted_path)
+
+
+def test_unzst_without_decompressor(tmpdir, mocker):
+    mocker.patch.object(download_utils.shutil, 'which', return_value=None)
+    mocker.patch.object(download_utils, 'zstandard', None)
+
+    with pytest.raises(ImportError):
+        download_utils.unzst(os.path.join(str(tmpdir), 'file.txt.zst'))
+
+
+def test_download_zst_file(mocker, mock_file):
+    mock_unzst = mocker.patch.object(download_utils, 'unzst')
+    mock_file.return_value = "foo"
+    download_utils.download_zst_file("a", "b", True)
+
+    mock_file.assert_called_once_with("a", "b", True, skip_mkdir=False)
+    mock_unzst.assert_called_once_with("foo", cleanup=True)
+
+
 def test_download_zip_file(mocker, mock_file, mock_unzip):
+    # the size of the remote is unknown, so it is streamed to disk
+    mock_session = mocker.patch.object(download_utils, '_session')
+    response = mock_session.return_value.get.return_value
+    response.headers = {}
+    zip_remote = download_utils.RemoteFileMetadata(
+        filename='remote.zip', url='a', checksum=('1234'), destination_dir=None
+    )
     mock_file.return_value = "foo"
-    download_utils.download_zip_file("a", "b", True)
+    download_utils.download_zip_file(zip_remote, "b", True)
 
-    mock_file.assert_called_once_with("a", "b", True)
+    mock_file.assert_called_once_with(
+        zip_remote, "b", True, skip_mkdir=True, response=response
+    )
     mock_unzip.assert_called_once_with("foo", cleanup=True)
     if os.path.exists('a'):
         shutil.rmtree('a')
 
 
+@pytest.mark.parametrize('cleanup', [True, False])
+def test_download_zip_file_in_memory(httpserver, tmpdir, mocker, mock_unzip, cleanup):
+    httpserver.serve_content(open('tests/resources/remote.zip', 'rb').read())
+    mock_file = mocker.spy(download_utils, 'download_from_remote')
+
+    zip_remote = download_utils.RemoteFileMetadata(
+        filename='remote.zip',
+        url=httpserver.url,
+        checksum=download_utils.md5('tests/resources/remote.zip'),
+        destination_dir='sub',
+    )
+    download_utils.download_zip_file(zip_remote, str(tmpdir), False, cleanup=cleanup)
+
+    mock_file.assert_not_called()
+    mock_unzip.assert_not_called()
+    assert [request.method for request in httpserver.requests] == ['GET']
+    assert os.path.exists(os.path.join(str(tmpdir), 'sub', 'remote.wav'))
+    zip_path = os.path.join(str(tmpdir), 'sub', 'remote.zip')
+    assert os.path.exists(zip_path) is not cleanup
+    if not cleanup:
+        assert download_utils.md5(zip_path) == zip_remote.checksum
+
+
+def test_download_zip_file_in_memory_removes_stale_zip(httpserver, tmpdir):
+    httpserver.serve_content(open('tests/resources/remote.zip', 'rb').read())
+    zip_path = os.path.join(str(tmpdir), 'remote.zip')
+    with open(zip_path, 'wb') as fhandle:
+        fhandle.write(b'stale')
+
+    zip_remote = download_utils.RemoteFileMetadata(
+        filename='remote.zip',
+        url=httpserver.url,
+        checksum=download_utils.md5('tests/resources/remote.zip'),
+        destination_dir=None,
+    )
+    download_utils.download_zip_file(zip_remote, str(tmpdir), True, cleanup=True)
+
+    assert os.path.exists(os.path.join(str(tmpdir), 'remote.wav'))
+    assert not os.path.exists(zip_path)
+
+
+def test_download_zip_file_memory_slots_taken(httpserver, tmpdir, mocker):
+    httpserver.serve_content(open('tests/resources/remote.zip', 'rb').read())
+    mocker.patch.object(
+        download_utils, '_MEM_EXTRACT_SLOTS', download_utils.threading.Semaphore(0)
+    )
+    mock_file = mocker.spy(download_utils, 'download_from_remote')
+
+    zip_remote = download_utils.RemoteFileMetadata(
+        filename='remote.zip',
+        url=httpserver.url,
+        checksum=download_utils.md5('tests/resources/remote.zip'),
+        destination_dir=None,
+    )
+    download_utils.download_zip_file(zip_remote, str(tmpdir), False)
+
+    # other workers hold the maximum number of zip files in memory
+    assert mock_file.call_count == 1
+    assert os.path.exists(os.path.join(str(tmpdir), 'remote.wav'))
+
+
+def test_download_zip_file_in_memory_bad_checksum(httpserver, tmpdir):
+    httpserver.serve_content(open('tests/resources/remote.zip', 'rb').read())
+
+    zip_remote = download_utils.RemoteFileMetadata(
+        filename='remote.zip', url=httpserver.url, checksum='1234', destination_dir=None
+    )
+    with pytest.raises(IOError):
+        download_utils.download_zip_file(zip_remote, str(tmpdir), False)
+    assert not os.path.exists(os.path.join(str(tmpdir), 'remote.wav'))
+
+
+def test_download_zip_file_too_large_for_memory(httpserver, tmpdir, mocker):
+    httpserver.serve_content(open('tests/resources/remote.zip', 'rb').read())
+    mocker.patch.object(download_utils, 'MEM_EXTRACT_MAX_SIZE', 10)
+    mock_file = mocker.spy(download_utils, 'download_from_remote')
+
+    zip_remote = download_utils.RemoteFileMetadata(
+        filename='remote.zip',
+        url=httpserver.url,
+        checksum=download_utils.md5('tests/resources/remote.zip'),
+        destination_dir=None,
+    )
+    download_utils.download_zip_file(zip_remote, str(tmpdir), False)
+
+    assert mock_file.call_count == 1
+    # the response used to find the size of the zip file is streamed to disk
+    assert [request.method for request in httpserver.requests] == ['GET']
+    assert os.path.exists(os.path.join(str(tmpdir), 'remote.wav'))
+
+
 def test_download_tar_file(mocker, mock_file, mock_untar):
     mock_file.return_value = "foo"
     download_utils.download_tar_file("a", "b", True)
 
-    mock_file.assert_called_once_with("a", "b", True)
+    mock_file.assert_called_once_with("a", "b", True, skip_mkdir=False)
     mock_untar.assert_called_once_with("foo", cleanup=True)
     if os.path.exists('a'):
         shutil.rmtree('a')
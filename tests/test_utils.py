@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
 import itertools
 import os
 import sys
@@ -83,19 +84,48 @@ def mock_check_index(mocker):
     return mocker.patch.object(utils, 'check_index')
 
 
-def test_md5(mocker):
+def test_md5(tmpdir):
     audio_file = b'audio1234'
 
     expected_checksum = '6dc00d1bac757abe4ea83308dde68aab'
 
-    mocker.patch(
-        '%s.open' % builtin_module_name, new=mocker.mock_open(read_data=audio_file)
-    )
+    test_file_path = os.path.join(str(tmpdir), 'test_file')
+    with open(test_file_path, 'wb') as fhandle:
+        fhandle.write(audio_file)
 
-    md5_checksum = utils.md5('test_file_path')
+    md5_checksum = utils.md5(test_file_path)
     assert expected_checksum == md5_checksum
 
 
+def test_hash_file(tmpdir):
+    test_file_path = os.path.join(str(tmpdir), 'test_file')
+    with open(test_file_path, 'wb') as fhandle:
+        fhandle.write(b'audio1234')
+
+    sha1_checksum = utils.hash_file(test_file_path, hashlib.sha1())
+    assert hashlib.sha1(b'audio1234').hexdigest() == sha1_checksum
+
+
+@pytest.mark.parametrize('error', [OSError(19, 'No such device'), OverflowError()])
+def test_hash_file_without_mmap(tmpdir, mocker, error):
+    mocker.patch.object(utils.mmap, 'mmap', side_effect=error)
+    mocker.patch.object(utils, 'HASH_CHUNK_SIZE', 4)
+    test_file_path = os.path.join(str(tmpdir), 'test_file')
+    with open(test_file_path, 'wb') as fhandle:
+        fhandle.write(b'audio1234')
+
+    md5_checksum = utils.md5(test_file_path)
+    assert '6dc00d1bac757abe4ea83308dde68aab' == md5_checksum
+
+
+def test_md5_empty_file(tmpdir):
+    test_file_path = os.path.join(str(tmpdir), 'empty_file')
+    open(test_file_path, 'wb').close()
+
+    md5_checksum = utils.md5(test_file_path)
+    assert 'd41d8cd98f00b204e9800998ecf8427e' == md5_checksum
+
+
 @pytest.mark.parametrize(
     'test_index,expected_missing,expected_inv_checksum',
     [